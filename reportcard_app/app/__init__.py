@@ -28,6 +28,10 @@ upload_folder = os.path.join(basedir, '..', 'data', 'uploads')
 os.makedirs(upload_folder, exist_ok=True)
 app.config['UPLOAD_FOLDER'] = upload_folder
 
+# Number of processes used to parse the Evaluations group sheets on import.
+# 1 parses them serially, 0 uses every CPU core.
+app.config['EVALUATION_WORKERS'] = int(os.environ.get('EVALUATION_WORKERS', '1'))
+
 # Import routes and models after app and db are created
 from app import routes, models
 
@@ -38,3 +42,21 @@ def init_db_command():
         db.create_all()
     print("Initialized the database.")
 
+@app.cli.command("backfill-analytics")
+@click.option('--all', 'recompute_all', is_flag=True, help='Also recompute sessions that already have analytics.')
+def backfill_analytics_command(recompute_all):
+    """Builds the skill analytics rows for sessions imported before they existed."""
+    from app.models import Session, SkillAnalytics
+    from app.processing import refresh_session_analytics
+
+    with app.app_context():
+        db.create_all()
+        for session in Session.query.order_by(Session.id).all():
+            if not recompute_all and SkillAnalytics.query.filter_by(session_id=session.id).first():
+                continue
+            refresh_session_analytics(session.id)
+            print(f"Built analytics for session '{session.name}'.")
+    print("Analytics backfill complete.")
+
+from app.startup_check import check_startup_command
+app.cli.add_command(check_startup_command)
@@ -0,0 +1,28 @@
+import csv
+import os
+from app import app
+
+# --- Mapping Tables ---
+# The mapping CSVs are small and never change at runtime, so they are parsed
+# once with the standard library and kept in memory. Keeping this module free
+# of pandas lets the web workers import it cheaply, and when gunicorn preloads
+# the app the parsed tables are shared between forked workers.
+
+MAPPING_FILES = ('report_card_mapping.csv', 'skill_names.csv', 'ribbons.csv')
+
+_mapping_cache = {}
+
+def load_mapping_rows(filename):
+    """Returns the rows of a mapping CSV from the data/mapping directory as a tuple of dicts."""
+    rows = _mapping_cache.get(filename)
+    if rows is None:
+        path = os.path.join(app.root_path, '..', 'data', 'mapping', filename)
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = tuple(csv.DictReader(f))
+        _mapping_cache[filename] = rows
+    return rows
+
+def preload_mappings():
+    """Loads every mapping table into the cache, e.g. in the gunicorn master before forking."""
+    for filename in MAPPING_FILES:
+        load_mapping_rows(filename)
@@ -7,6 +7,7 @@ class Session(db.Model):
     club_name = db.Column(db.String(100), nullable=False)
     skaters = db.relationship('Skater', backref='session', lazy=True, cascade="all, delete-orphan")
     validation_results = db.Column(db.Text, nullable=True)
+    analytics = db.relationship('SkillAnalytics', backref='session', lazy=True, cascade="all, delete-orphan")
 
 class Skater(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -29,3 +30,15 @@ class Skater(db.Model):
     assigned_coach_token = db.Column(db.String(100), nullable=True)
     
     comment_status = db.Column(db.String(20), nullable=True)
+
+class SkillAnalytics(db.Model):
+    """Materialized per-group pass counts, computed at import and refreshed when skater data is edited."""
+    id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.Integer, db.ForeignKey('session.id'), nullable=False, index=True)
+    group_name = db.Column(db.String(50), nullable=True)
+
+    kind = db.Column(db.String(20), nullable=False) # 'skill', 'ribbon', 'badge_ready' or 'badge_awarded'
+    name = db.Column(db.String(150), nullable=False)
+
+    skater_count = db.Column(db.Integer, nullable=False)
+    passed_count = db.Column(db.Integer, nullable=False)
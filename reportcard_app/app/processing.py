@@ -5,8 +5,13 @@ import openpyxl
 import re
 import json
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import repeat
 from app import app, db
-from app.models import Session, Skater
+from app.models import Session, Skater, SkillAnalytics
+from app.mappings import load_mapping_rows
+from app.schema import apply_schema, achievement_date_columns, skill_columns, skater_records, load_skater_frame
 
 # --- Helper Functions ---
 
@@ -35,9 +40,8 @@ def normalize_name(name):
     return capitalized_name, normalized
 
 def load_mapping_df(filename):
-    """Loads a mapping CSV from the data/mapping directory."""
-    path = os.path.join(app.root_path, '..', 'data', 'mapping', filename)
-    return pd.read_csv(path)
+    """Builds a DataFrame from a cached mapping CSV in the data/mapping directory."""
+    return pd.DataFrame(list(load_mapping_rows(filename)))
 
 def transform_ribbon_name(ribbon):
     """Standardizes ribbon names to match the mapping files."""
@@ -112,14 +116,13 @@ def validate_and_load_data(session_path, form_session_name):
         return {'success': False, 'message': msg}
 
     try:
-        achievements_df = pd.read_excel(achievements_path)
+        achievements_df = apply_schema(pd.read_excel(achievements_path))
         achievements_df['Skater Name_temp'] = achievements_df['First Name'] + ' ' + achievements_df['Last Name']
         _, achievements_df['Normalized Name'] = zip(*achievements_df['Skater Name_temp'].apply(normalize_name))
         
         evaluations_df = get_skater_list_from_evaluations(evaluations_path)
 
-        date_cols = achievements_df.drop(columns=['First Name', 'Last Name', 'Skater Name_temp', 'Normalized Name'], errors='ignore')
-        latest_date = pd.to_datetime(date_cols.stack(), errors='coerce').max()
+        latest_date = achievements_df[achievement_date_columns(achievements_df.columns)].max().max()
         latest_achievement_date = latest_date.strftime('%Y-%m-%d') if pd.notna(latest_date) else 'N/A'
 
         ach_skaters_normalized = set(achievements_df['Normalized Name'])
@@ -175,7 +178,7 @@ def process_and_save_to_db(session_path, session_name, club_name, report_date, r
     evaluations_path = upload2_path if identify_report_type(upload2_path) == 'Achievements' else upload1_path
 
     try:
-        achievements_df = pd.read_excel(achievements_path)
+        achievements_df = apply_schema(pd.read_excel(achievements_path))
         achievements_df['Skater Name_temp'] = achievements_df['First Name'] + ' ' + achievements_df['Last Name']
         achievements_df['Skater Name'], achievements_df['Normalized Name'] = zip(*achievements_df['Skater Name_temp'].apply(normalize_name))
         
@@ -203,14 +206,14 @@ def process_and_save_to_db(session_path, session_name, club_name, report_date, r
         db.session.add(new_session)
         db.session.commit()
 
-        for index, row in merged_df.iterrows():
-            skater_data_dict = row.to_dict()
-            final_data = {k: v for k, v in skater_data_dict.items() if pd.notna(v)}
-            
+        for row in compute_skill_analytics(merged_df):
+            db.session.add(SkillAnalytics(session_id=new_session.id, **row))
+
+        for final_data in skater_records(merged_df):
             skater = Skater(
                 name=final_data.get('Skater Name'),
                 group_name=final_data.get('Group Name'),
-                birthdate=pd.to_datetime(final_data.get('Birthdate')).strftime('%Y-%m-%d') if pd.notna(final_data.get('Birthdate')) else None,
+                birthdate=final_data.get('Birthdate'),
                 generates_pcs_report=final_data.get('generates_pcs_report', False),
                 generates_cs_report=final_data.get('generates_cs_report', False),
                 session_id=new_session.id,
@@ -228,48 +231,104 @@ def process_and_save_to_db(session_path, session_name, club_name, report_date, r
         app.logger.error(f"Error during database import: {e}", exc_info=True)
         return False, None
 
-def load_and_transform_evaluations(file_path):
-    """Loads, transforms, and consolidates the evaluations data from the Excel file."""
-    xls = pd.ExcelFile(file_path)
-    all_skater_data = []
-    group_pattern = re.compile(r'--\s*(.*)')
-    
-    mapping_df = load_mapping_df('report_card_mapping.csv')
-    skill_mapping = dict(zip(mapping_df['Our Name'], mapping_df['Report Card Name']))
+def parse_evaluation_sheet(xls, sheet_name, skill_mapping):
+    """
+    Parses one CanSkate/Pre-CanSkate group sheet of an open ExcelFile into a
+    compact result: the skater names, the mapped skill columns and a boolean
+    matrix of passed skills.
+    """
+    is_pcs_sheet = 'pre-canskate' in sheet_name.lower()
+    is_cs_sheet = 'canskate' in sheet_name.lower()
 
-    for sheet_name in xls.sheet_names:
-        is_pcs_sheet = 'pre-canskate' in sheet_name.lower()
-        is_cs_sheet = 'canskate' in sheet_name.lower()
-        if not is_pcs_sheet and not is_cs_sheet:
-            continue
+    match = re.search(r'--\s*(.*)', sheet_name)
+    group_name = match.group(1).strip() if match else 'Unknown Group'
 
-        match = group_pattern.search(sheet_name)
-        group_name = match.group(1).strip() if match else 'Unknown Group'
-        
-        header_df = pd.read_excel(xls, sheet_name=sheet_name, header=None, nrows=3)
-        ribbon_names_raw = header_df.iloc[1, 1:].ffill()
-        skill_names_raw = header_df.iloc[2, 1:]
-        
-        raw_column_names = [f"{transform_ribbon_name(ribbon)} - {str(skill).strip()}" for ribbon, skill in zip(ribbon_names_raw, skill_names_raw)]
-        
-        mapped_column_names = [skill_mapping.get(name, name) for name in raw_column_names]
+    # Read the sheet once: rows 1-2 hold the ribbon and skill headers, the skaters start at row 3.
+    raw_df = pd.read_excel(xls, sheet_name=sheet_name, header=None)
+    ribbon_names_raw = raw_df.iloc[1, 1:].ffill()
+    skill_names_raw = raw_df.iloc[2, 1:]
 
-        sheet_df = pd.read_excel(xls, sheet_name=sheet_name, header=None, skiprows=3)
-        sheet_df.columns = ['Skater Name'] + mapped_column_names
-        
-        sheet_df = sheet_df.dropna(subset=['Skater Name'])
-        sheet_df = sheet_df[~sheet_df['Skater Name'].astype(str).str.startswith('*')]
+    raw_column_names = [f"{transform_ribbon_name(ribbon)} - {str(skill).strip()}" for ribbon, skill in zip(ribbon_names_raw, skill_names_raw)]
 
-        sheet_df['Skater Name'], sheet_df['Normalized Name'] = zip(*sheet_df['Skater Name'].apply(normalize_name))
-        sheet_df['Group Name'] = group_name
-        
-        sheet_df['generates_pcs_report'] = is_pcs_sheet
-        sheet_df['generates_cs_report'] = is_cs_sheet
-        
-        for col in mapped_column_names:
-            sheet_df[col] = sheet_df[col].astype(str).str.contains('✓', na=False)
+    mapped_column_names = [skill_mapping.get(name, name) for name in raw_column_names]
+
+    sheet_df = raw_df.iloc[3:].reset_index(drop=True)
+    sheet_df.columns = ['Skater Name'] + mapped_column_names
+
+    sheet_df = sheet_df.dropna(subset=['Skater Name'])
+    sheet_df = sheet_df[~sheet_df['Skater Name'].astype(str).str.startswith('*')]
+
+    names = [normalize_name(name) for name in sheet_df['Skater Name']]
+
+    skills = np.empty((len(sheet_df), len(mapped_column_names)), dtype=bool)
+    for i, col in enumerate(mapped_column_names):
+        skills[:, i] = sheet_df[col].astype(str).str.contains('✓', na=False).to_numpy()
+
+    return {
+        'skater_names': [name for name, _ in names],
+        'normalized_names': [normalized for _, normalized in names],
+        'group_name': group_name,
+        'is_pcs': is_pcs_sheet,
+        'is_cs': is_cs_sheet,
+        'skill_columns': mapped_column_names,
+        'skills': skills,
+    }
+
+def parse_evaluation_sheet_batch(file_path, sheet_names, skill_mapping):
+    """
+    Opens the workbook once and parses a batch of its group sheets. Defined at
+    module level so it can run in a worker process.
+    """
+    xls = pd.ExcelFile(file_path)
+    return [parse_evaluation_sheet(xls, sheet_name, skill_mapping) for sheet_name in sheet_names]
+
+def evaluation_sheet_to_df(result):
+    """Rebuilds a per-sheet DataFrame from the result of parse_evaluation_sheet."""
+    sheet_df = pd.DataFrame(result['skills'], columns=result['skill_columns'])
+    sheet_df.insert(0, 'Skater Name', result['skater_names'])
+    sheet_df['Normalized Name'] = result['normalized_names']
+    sheet_df['Group Name'] = result['group_name']
+    sheet_df['generates_pcs_report'] = result['is_pcs']
+    sheet_df['generates_cs_report'] = result['is_cs']
+    return sheet_df
+
+def parse_evaluation_sheets(xls, file_path, sheet_names, skill_mapping, workers):
+    """
+    Parses the group sheets, splitting them into one contiguous batch per
+    process when workers > 1 so each process opens the workbook only once.
+    """
+    if workers > 1 and len(sheet_names) > 1:
+        workers = min(workers, len(sheet_names))
+        batch_size = -(-len(sheet_names) // workers)
+        batches = [sheet_names[i:i + batch_size] for i in range(0, len(sheet_names), batch_size)]
+        try:
+            with ProcessPoolExecutor(max_workers=len(batches)) as executor:
+                results = executor.map(parse_evaluation_sheet_batch, repeat(file_path), batches, repeat(skill_mapping))
+                return [result for batch in results for result in batch]
+        except (OSError, BrokenProcessPool) as e:
+            app.logger.warning(f"Parallel evaluations parsing unavailable, falling back to serial: {e}")
+
+    return [parse_evaluation_sheet(xls, sheet_name, skill_mapping) for sheet_name in sheet_names]
+
+def load_and_transform_evaluations(file_path, workers=None):
+    """
+    Loads, transforms, and consolidates the evaluations data from the Excel file.
+    Group sheets are parsed in parallel when `workers` (default: the
+    EVALUATION_WORKERS setting) is greater than 1; 0 uses every CPU core.
+    """
+    if workers is None:
+        workers = app.config['EVALUATION_WORKERS']
+    if workers == 0:
+        workers = os.cpu_count() or 1
+
+    xls = pd.ExcelFile(file_path)
+    
+    mapping_df = load_mapping_df('report_card_mapping.csv')
+    skill_mapping = dict(zip(mapping_df['Our Name'], mapping_df['Report Card Name']))
 
-        all_skater_data.append(sheet_df)
+    sheet_names = [name for name in xls.sheet_names if 'canskate' in name.lower()]
+    results = parse_evaluation_sheets(xls, file_path, sheet_names, skill_mapping, workers)
+    all_skater_data = [evaluation_sheet_to_df(result) for result in results]
 
     if not all_skater_data:
         return pd.DataFrame()
@@ -323,18 +382,16 @@ def process_skill_variations(df):
 
 def autofix_achievement_dates(df):
     """Corrects any chronological errors in achievement dates for each skater."""
-    for index, skater in df.iterrows():
-        for category in ['Agility', 'Balance', 'Control']:
-            dates = {}
-            for stage in range(1, 7):
-                col_name = f"CanSkate {stage} - {category}"
-                if col_name in skater and pd.notna(skater[col_name]):
-                    dates[stage] = pd.to_datetime(skater[col_name])
-            
-            for stage in range(6, 1, -1):
-                if stage in dates and (stage - 1) in dates:
-                    if dates[stage - 1] > dates[stage]:
-                        df.loc[index, f"CanSkate {stage - 1} - {category}"] = dates[stage]
+    for category in ['Agility', 'Balance', 'Control']:
+        stage_cols = {stage: f"CanSkate {stage} - {category}" for stage in range(1, 7)}
+        existing_cols = [col for col in stage_cols.values() if col in df.columns]
+        original_dates = df[existing_cols].copy()
+
+        for stage in range(6, 1, -1):
+            col, prev_col = stage_cols[stage], stage_cols[stage - 1]
+            if col in original_dates and prev_col in original_dates:
+                out_of_order = original_dates[prev_col] > original_dates[col]
+                df.loc[out_of_order, prev_col] = original_dates.loc[out_of_order, col]
     return df
 
 def generate_badge_dates(df):
@@ -357,33 +414,27 @@ def automate_pcs_recommendation(df, report_date):
     """Automates the recommendation for PreCanSkate skaters based on age and progress."""
     df['Recommendation'] = None
     df['Recommendation Reason'] = None
-    pcs_skaters_mask = df['generates_pcs_report'] == True
-    
-    for index, skater in df[pcs_skaters_mask].iterrows():
-        birthdate = pd.to_datetime(skater.get('Birthdate'))
-        if pd.isna(birthdate):
-            continue
-            
-        age = (datetime.strptime(report_date, '%Y-%m-%d') - birthdate).days / 365.25
-        
-        passed_pcs4 = pd.notna(skater.get('Pre-CanSkate 4'))
-        passed_pcs2 = pd.notna(skater.get('Pre-CanSkate 2'))
-        
-        recommendation = "Remain in PreCanSkate"
-        reason = "Default recommendation."
-
-        if age >= 4.8:
-            recommendation = "Move to CanSkate"
-            reason = f"Age ({age:.1f}) is >= 4.8"
-        elif age >= 4.3 and passed_pcs2:
-            recommendation = "Move to CanSkate"
-            reason = f"Age ({age:.1f}) is >= 4.3 and PCS 2 is passed"
-        elif passed_pcs4:
-            recommendation = "Move to CanSkate"
-            reason = "PCS 4 is passed"
-            
-        df.loc[index, 'Recommendation'] = recommendation
-        df.loc[index, 'Recommendation Reason'] = reason
+    if 'Birthdate' not in df.columns:
+        return df
+
+    birthdates = pd.to_datetime(df['Birthdate'], errors='coerce')
+    age = (datetime.strptime(report_date, '%Y-%m-%d') - birthdates).dt.days / 365.25
+    pcs_skaters = df[(df['generates_pcs_report'] == True) & age.notna()]
+    # No PCS skaters, or none with a birthdate: leave every recommendation empty.
+    if pcs_skaters.empty:
+        return df
+    age = age[pcs_skaters.index]
+
+    no_date = pd.Series(pd.NaT, index=pcs_skaters.index)
+    passed_pcs4 = pcs_skaters.get('Pre-CanSkate 4', no_date).notna()
+    passed_pcs2 = pcs_skaters.get('Pre-CanSkate 2', no_date).notna()
+
+    conditions = [age >= 4.8, (age >= 4.3) & passed_pcs2, passed_pcs4]
+    age_text = age.map('{:.1f}'.format).astype(str)
+    reasons = ["Age (" + age_text + ") is >= 4.8", "Age (" + age_text + ") is >= 4.3 and PCS 2 is passed", "PCS 4 is passed"]
+
+    df.loc[pcs_skaters.index, 'Recommendation'] = np.select(conditions, ["Move to CanSkate"] * 3, "Remain in PreCanSkate").tolist()
+    df.loc[pcs_skaters.index, 'Recommendation Reason'] = np.select(conditions, reasons, "Default recommendation.").tolist()
         
     return df
 
@@ -394,7 +445,7 @@ def validate_missing_ribbons(df, report_date):
 
     for index, req in ribbon_reqs.iterrows():
         ribbon_name = req['Ribbon']
-        elements_needed = req['Skills Required']
+        elements_needed = int(req['Skills Required'])
 
         elements_for_ribbon = [col for col in df.columns if isinstance(col, str) and col.startswith(ribbon_name)]
         if not elements_for_ribbon: continue
@@ -412,7 +463,7 @@ def validate_missing_ribbons(df, report_date):
                 for next_stage in range(stage + 1, 7):
                     next_col = f"CanSkate {next_stage} - {category}"
                     if next_col in skater and pd.notna(skater[next_col]):
-                        suggested_date = skater[next_col]
+                        suggested_date = skater[next_col].strftime('%Y-%m-%d')
                         break
 
                 missing_ribbons.append({
@@ -420,7 +471,7 @@ def validate_missing_ribbons(df, report_date):
                     'Ribbon': ribbon_name,
                     'Skills Passed': int(skater['elements_passed_count']),
                     'Skills Required': int(elements_needed),
-                    'Suggested Date': pd.to_datetime(suggested_date).strftime('%Y-%m-%d')
+                    'Suggested Date': suggested_date
                 })
     return missing_ribbons
 
@@ -429,12 +480,133 @@ def rerun_validation(session_id):
     session = Session.query.get(session_id)
     if not session: return
 
-    skaters = session.skaters
-    skater_data_list = [json.loads(s.skater_data) for s in skaters]
-    df = pd.DataFrame(skater_data_list)
+    df = load_skater_frame(session.skaters)
 
     df = autofix_achievement_dates(df)
     df = generate_badge_dates(df)
     validation_results = validate_missing_ribbons(df, session.report_date)
     session.validation_results = json.dumps(validation_results)
     db.session.commit()
+
+
+# --- Analytics Roll-ups ---
+
+def skill_display_names():
+    """Maps report card codes back to readable skill names, e.g. '02_3' -> 'Agility 1 - 2-ft jump'."""
+    mapping_df = load_mapping_df('report_card_mapping.csv')
+    return dict(zip(mapping_df['Report Card Name'], mapping_df['Our Name']))
+
+def program_eligibility(df):
+    """Returns boolean masks of the skaters assessed in the CanSkate and PreCanSkate programs."""
+    is_pcs = df['generates_pcs_report'].fillna(False).astype(bool)
+    # Pre-CanSkate sheet names also contain "canskate", so PCS skaters carry
+    # generates_cs_report too; they are not assessed on CanSkate skills.
+    is_cs = df['generates_cs_report'].fillna(False).astype(bool) & ~is_pcs
+    return is_cs, is_pcs
+
+def rollup_by_group(df, eligible, metrics):
+    """Sums the boolean metrics over the eligible skaters of each group."""
+    if not metrics or not eligible.any():
+        return []
+
+    grouped = pd.DataFrame(metrics, index=df.index)[eligible].groupby(df.loc[eligible, 'Group Name'])
+    passed_counts = grouped.sum()
+    group_sizes = grouped.size()
+
+    rows = []
+    for group_name, counts in passed_counts.iterrows():
+        for (kind, name), passed in counts.items():
+            rows.append({
+                'group_name': group_name,
+                'kind': kind,
+                'name': name,
+                'skater_count': int(group_sizes[group_name]),
+                'passed_count': int(passed),
+            })
+    return rows
+
+def compute_skill_analytics(df):
+    """
+    Computes per-group pass counts for every skill, ribbon and badge with
+    vectorized groupbys. Each metric counts only the skaters of its program,
+    and groups get no rows for a program they don't run. Returns one dict
+    per SkillAnalytics row.
+
+    A ribbon is earned when its achievement date is present or its skill
+    threshold is met, and a badge is ready when all three of its ribbons are
+    earned. Ribbons and stages with neither skill columns nor any recorded
+    date in the frame are skipped.
+    """
+    if df.empty or 'Group Name' not in df.columns:
+        return []
+
+    display_names = skill_display_names()
+    skills = {col: display_names.get(col, col) for col in skill_columns(df.columns)}
+    cs_skills = {col: name for col, name in skills.items() if not name.startswith('PreCanSkate')}
+    pcs_skills = {col: name for col, name in skills.items() if name.startswith('PreCanSkate')}
+
+    cs_metrics = {('skill', name): df[col] for col, name in cs_skills.items()}
+    pcs_metrics = {('skill', name): df[col] for col, name in pcs_skills.items()}
+
+    # Dates are only compared by whether any skater has one: stored skater_data
+    # drops empty dates, so an all-empty column at import is absent on reload.
+    not_earned = pd.Series(False, index=df.index)
+    def dated(col):
+        return df[col].notna() if col in df.columns else not_earned
+
+    ribbon_reqs = load_mapping_df('ribbons.csv')
+    earned = {}
+    for ribbon_name, elements_needed in zip(ribbon_reqs['Ribbon'], ribbon_reqs['Skills Required']):
+        category, stage = ribbon_name.split(' ')
+        achievement_dates = dated(f"CanSkate {stage} - {category}")
+        elements_for_ribbon = [col for col, name in cs_skills.items() if name.split(' - ')[0] == ribbon_name]
+        if not elements_for_ribbon and not achievement_dates.any():
+            continue
+
+        passed_skills = df[elements_for_ribbon].sum(axis=1) >= int(elements_needed) if elements_for_ribbon else not_earned
+        earned[ribbon_name] = passed_skills | achievement_dates
+        cs_metrics[('ribbon', ribbon_name)] = earned[ribbon_name]
+
+    for stage in range(1, 7):
+        badge_name = f"Stage {stage}"
+        stage_ribbons = [f"{category} {stage}" for category in ['Agility', 'Balance', 'Control']]
+        badge_dates = dated(badge_name)
+        if not any(ribbon in earned for ribbon in stage_ribbons) and not badge_dates.any():
+            continue
+
+        ribbons_earned = [earned.get(ribbon, not_earned) for ribbon in stage_ribbons]
+        cs_metrics[('badge_ready', badge_name)] = ribbons_earned[0] & ribbons_earned[1] & ribbons_earned[2]
+        cs_metrics[('badge_awarded', badge_name)] = badge_dates
+
+    is_cs, is_pcs = program_eligibility(df)
+    return rollup_by_group(df, is_cs, cs_metrics) + rollup_by_group(df, is_pcs, pcs_metrics)
+
+def replace_analytics_rows(session_id, group_name=None):
+    """
+    Recomputes the analytics rows of a session from its skaters' stored data,
+    replacing only the rows of `group_name` when one is given. The whole
+    session is always loaded, so the metrics emitted for a group match the
+    ones computed at import.
+    """
+    stale_rows = SkillAnalytics.query.filter_by(session_id=session_id)
+    if group_name is not None:
+        stale_rows = stale_rows.filter_by(group_name=group_name)
+    stale_rows.delete()
+
+    skaters = Skater.query.filter_by(session_id=session_id).all()
+    if skaters:
+        df = load_skater_frame(skaters)
+        df = autofix_achievement_dates(df)
+        df = generate_badge_dates(df)
+        for row in compute_skill_analytics(df):
+            if group_name is None or row['group_name'] == group_name:
+                db.session.add(SkillAnalytics(session_id=session_id, **row))
+    db.session.commit()
+
+def refresh_group_analytics(session_id, group_name):
+    """Recomputes the analytics rows for one group after its skaters' data has been edited."""
+    replace_analytics_rows(session_id, group_name)
+
+def refresh_session_analytics(session_id):
+    """Recomputes every analytics row of a session, e.g. for sessions imported before analytics existed."""
+    replace_analytics_rows(session_id)
@@ -1,13 +1,16 @@
 from app import app, db
-from app.models import Session, Skater
-from flask import render_template, request, redirect, url_for, flash, session
+from app.models import Session, Skater, SkillAnalytics
+from flask import render_template, request, redirect, url_for, flash, session, jsonify
+from sqlalchemy import func
 from werkzeug.utils import secure_filename
 import os
 import json
 import secrets
 from datetime import date
 from collections import defaultdict
-from app.processing import validate_and_load_data, process_and_save_to_db, rerun_validation
+
+# app.processing pulls in pandas, numpy and openpyxl, so it is imported inside
+# the ingestion views only. Coach and report pages never load it.
 
 @app.route('/')
 def dashboard():
@@ -36,6 +39,7 @@ def upload_files():
         achievements_file.save(os.path.join(session_path, "upload1.xlsx"))
         evaluations_file.save(os.path.join(session_path, "upload2.xlsx"))
         
+        from app.processing import validate_and_load_data
         validation_results = validate_and_load_data(session_path, session_name)
         
         if validation_results['success']:
@@ -64,6 +68,7 @@ def confirm_session():
         replace_existing = request.form.get('replace') == 'true'
         session_name = confirmation_data['form_session_name']
         
+        from app.processing import process_and_save_to_db
         success, new_session_id = process_and_save_to_db(
             session_path=confirmation_data['session_path'],
             session_name=session_name,
@@ -108,7 +113,9 @@ def autofix_achievement():
         skater.skater_data = json.dumps(skater_data)
         db.session.commit()
         
+        from app.processing import rerun_validation, refresh_group_analytics
         rerun_validation(session_id)
+        refresh_group_analytics(session_id, skater.group_name)
         flash(f"Achievement for {skater_name} has been auto-fixed.", 'success')
     else:
         flash("Could not find the specified skater to apply the fix.", 'error')
@@ -127,6 +134,46 @@ def session_detail(session_id):
         
     return render_template('session_detail.html', session=session_obj, skaters_by_group=skaters_by_group)
 
+def analytics_totals(session_ids):
+    """Sums the materialized group roll-ups across the given sessions."""
+    query = db.session.query(
+        SkillAnalytics.kind,
+        SkillAnalytics.name,
+        func.sum(SkillAnalytics.skater_count),
+        func.sum(SkillAnalytics.passed_count)
+    )
+    if session_ids:
+        query = query.filter(SkillAnalytics.session_id.in_(session_ids))
+    rows = query.group_by(SkillAnalytics.kind, SkillAnalytics.name).order_by(SkillAnalytics.kind, SkillAnalytics.name).all()
+    return [{'kind': kind, 'name': name, 'skater_count': skaters, 'passed_count': passed} for kind, name, skaters, passed in rows]
+
+def analytics_by_group(session_id):
+    """Returns the materialized roll-up rows of a session keyed by group name."""
+    rows = SkillAnalytics.query.filter_by(session_id=session_id).order_by(SkillAnalytics.kind, SkillAnalytics.name).all()
+    by_group = defaultdict(list)
+    for row in rows:
+        by_group[row.group_name].append({'kind': row.kind, 'name': row.name, 'skater_count': row.skater_count, 'passed_count': row.passed_count})
+    return by_group
+
+@app.route('/session/<int:session_id>/analytics')
+def session_analytics(session_id):
+    """Displays skill, ribbon and badge pass rates for a session and each of its groups."""
+    session_obj = Session.query.get_or_404(session_id)
+    return render_template('analytics.html', session=session_obj,
+                           totals=analytics_totals([session_id]), groups=analytics_by_group(session_id))
+
+@app.route('/api/session/<int:session_id>/analytics')
+def session_analytics_api(session_id):
+    """Returns the session and per-group roll-ups as JSON."""
+    Session.query.get_or_404(session_id)
+    return jsonify({'session_id': session_id, 'totals': analytics_totals([session_id]), 'groups': analytics_by_group(session_id)})
+
+@app.route('/api/analytics')
+def season_analytics_api():
+    """Returns roll-ups summed across the sessions given as ?session_id=, or across all sessions."""
+    session_ids = request.args.getlist('session_id', type=int)
+    return jsonify({'session_ids': session_ids, 'totals': analytics_totals(session_ids)})
+
 @app.route('/session/<int:session_id>/delete', methods=['POST'])
 def delete_session(session_id):
     """Deletes a session and all associated data."""
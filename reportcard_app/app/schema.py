@@ -0,0 +1,81 @@
+import json
+import re
+import pandas as pd
+from app import app
+
+# --- Ingestion Schema ---
+# Achievement, badge and birth dates are converted to datetime64 once, a whole
+# column at a time, when a frame is loaded from the Achievements report or from
+# stored skater_data. Every column that is not a date, name, group,
+# recommendation or derived field is a skill and is stored as a bool, as are
+# the report flags. Stored dates are written as YYYY-MM-DD so that reloading
+# them is a fixed-format parse instead of per-value inference.
+
+DATE_FORMAT = '%Y-%m-%d'
+BIRTHDATE_COLUMN = 'Birthdate'
+ACHIEVEMENT_DATE_PATTERN = re.compile(r'CanSkate \d+ - (Agility|Balance|Control)|Stage \d+( CanSkate)?|Pre-CanSkate \d+')
+
+NAME_COLUMNS = ['Skater Name', 'Normalized Name', 'First Name', 'Last Name']
+GROUP_COLUMN = 'Group Name'
+RECOMMENDATION_COLUMNS = ['Recommendation', 'Recommendation Reason']
+# Working column added by validate_missing_ribbons
+DERIVED_COLUMNS = ['elements_passed_count']
+FLAG_COLUMNS = ['generates_pcs_report', 'generates_cs_report']
+
+NON_SKILL_COLUMNS = set(NAME_COLUMNS + [GROUP_COLUMN] + RECOMMENDATION_COLUMNS + DERIVED_COLUMNS + FLAG_COLUMNS)
+
+def achievement_date_columns(columns):
+    """Returns the ribbon and badge achievement date columns declared by the schema."""
+    return [col for col in columns if isinstance(col, str) and ACHIEVEMENT_DATE_PATTERN.fullmatch(col)]
+
+def date_columns(columns):
+    """Returns every column the schema stores as a date, including the birthdate."""
+    return [col for col in columns if col == BIRTHDATE_COLUMN or col in achievement_date_columns([col])]
+
+def skill_columns(columns):
+    """Returns the skill columns declared by the schema: everything that is not a date or a known non-skill field."""
+    dates = set(date_columns(columns))
+    return [col for col in columns if isinstance(col, str) and col not in NON_SKILL_COLUMNS and col not in dates]
+
+def bool_columns(columns):
+    """Returns the skill and report flag columns, which the schema stores as bools."""
+    return skill_columns(columns) + [col for col in FLAG_COLUMNS if col in columns]
+
+def cast_bool_columns(df):
+    """Casts the skill and flag columns to bool, treating missing values as not passed."""
+    for col in bool_columns(df.columns):
+        df[col] = df[col].astype('boolean').fillna(False).astype(bool)
+    return df
+
+def apply_schema(df, date_format='mixed'):
+    """
+    Converts the declared date columns of a frame to datetime64 in bulk. The
+    default 'mixed' format parses each text value on its own, since Uplifter
+    exports can mix date formats within a column; values that still cannot be
+    parsed are logged rather than silently dropped.
+    """
+    for col in date_columns(df.columns):
+        parsed = pd.to_datetime(df[col], errors='coerce', format=date_format)
+        unparsed = df[col].notna() & parsed.isna()
+        if unparsed.any():
+            examples = ', '.join(repr(value) for value in df.loc[unparsed, col].head(3))
+            app.logger.warning(f"{unparsed.sum()} value(s) in '{col}' could not be read as dates and were left empty: {examples}")
+        df[col] = parsed
+    if BIRTHDATE_COLUMN in df.columns:
+        df[BIRTHDATE_COLUMN] = df[BIRTHDATE_COLUMN].dt.normalize()
+    return df
+
+def skater_records(df):
+    """
+    Returns one dict per skater for the skater_data column: skills and flags as
+    bools, dates formatted as YYYY-MM-DD and other missing values dropped.
+    """
+    df = cast_bool_columns(df.copy())
+    for col in date_columns(df.columns):
+        df[col] = pd.to_datetime(df[col], errors='coerce').dt.strftime(DATE_FORMAT)
+    return [{k: v for k, v in record.items() if pd.notna(v)} for record in df.to_dict('records')]
+
+def load_skater_frame(skaters):
+    """Rebuilds a typed DataFrame from the stored skater_data of the given skaters."""
+    df = pd.DataFrame([json.loads(s.skater_data) for s in skaters])
+    return cast_bool_columns(apply_schema(df, date_format='ISO8601'))
@@ -0,0 +1,58 @@
+import json
+import os
+import subprocess
+import sys
+import click
+
+# --- Startup Check ---
+# Measures what a fresh web worker pays to import the app. Run by CI on every
+# push (see .github/workflows/startup-check.yml) and available locally as
+# `flask check-startup`.
+
+# Modules that must stay out of the web workers; they are only needed on the
+# upload/ingestion path (see app.processing).
+HEAVY_MODULES = ('pandas', 'numpy', 'openpyxl')
+
+STARTUP_PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+# ru_maxrss is in kilobytes on Linux and in bytes on macOS
+rss_mb = max_rss / (1024 * 1024) if sys.platform == 'darwin' else max_rss / 1024
+heavy = [name for name in %r if name in sys.modules]
+print(json.dumps({'seconds': elapsed, 'rss_mb': rss_mb, 'heavy_modules': heavy}))
+"""
+
+def measure_startup():
+    """Imports the app in a fresh interpreter and returns its import time, peak RSS and loaded heavy modules."""
+    app_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    result = subprocess.run(
+        [sys.executable, '-c', STARTUP_PROBE % (HEAVY_MODULES,)],
+        cwd=app_dir, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise click.ClickException(f"Importing the app failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+@click.command("check-startup")
+@click.option('--max-seconds', default=2.0, show_default=True, help='Maximum time allowed to import the app.')
+@click.option('--max-rss-mb', default=100.0, show_default=True, help='Maximum resident memory after importing the app.')
+def check_startup_command(max_seconds, max_rss_mb):
+    """Checks that a fresh worker imports the app quickly and without the processing stack."""
+    stats = measure_startup()
+
+    print(f"Import time: {stats['seconds']:.2f}s (limit {max_seconds:.2f}s)")
+    print(f"Peak RSS: {stats['rss_mb']:.1f} MB (limit {max_rss_mb:.1f} MB)")
+
+    problems = []
+    if stats['heavy_modules']:
+        problems.append(f"heavy modules loaded at import: {', '.join(stats['heavy_modules'])}")
+    if stats['seconds'] > max_seconds:
+        problems.append(f"import took {stats['seconds']:.2f}s")
+    if stats['rss_mb'] > max_rss_mb:
+        problems.append(f"peak RSS was {stats['rss_mb']:.1f} MB")
+    if problems:
+        raise click.ClickException("Startup check failed: " + "; ".join(problems))
+    print("Startup check passed.")
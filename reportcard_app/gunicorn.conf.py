@@ -0,0 +1,20 @@
+import os
+
+# Gunicorn picks this file up automatically when started from reportcard_app/,
+# e.g. `gunicorn run:app`.
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', '2'))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+
+# Import the app once in the master and fork the workers from it, so the
+# Flask app and the read-only mapping tables are shared copy-on-write instead
+# of being loaded again by every worker. The processing stack (pandas, numpy,
+# openpyxl) is not part of this; it is only imported by the worker handling
+# an upload.
+preload_app = True
+
+def on_starting(server):
+    """Parses the mapping tables in the master before any worker is forked."""
+    from app.mappings import preload_mappings
+    preload_mappings()